@@ -1,90 +1,247 @@
 import sys
+import numpy as np
 import pygame
 
+try:
+    from numba import njit
+except ImportError:  # bez numby jadra dzialaja jako zwykly Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
 # --- Stałe ---
 WIDTH, HEIGHT = 800, 600
 FPS = 60
 PLAYER_SPEED = 200
+PLAYER_SPEED_Q = PLAYER_SPEED << 16   # predkosc w fixed-point Q16.16
+PATH_CAPACITY = 2048
+PATH_MIN_DIST_SQ = 16   # min. kwadrat odleglosci miedzy punktami trasy
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
+GREY = (200, 200, 200)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+COLORKEY = (255, 0, 255)
 
 # ------------------------------------------------------
 # Tintowanie PNG
 # ------------------------------------------------------
 def tint_image(base, color):
+    if color == WHITE:
+        return base
+
     tinted = base.copy()
-    r, g, b = color
-    tint_surface = pygame.Surface(base.get_size(), pygame.SRCALPHA)
-    tint_surface.fill((r, g, b, 255))
-    tinted.blit(tint_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    # mnozenie kanalow RGB w miejscu, bez dodatkowej powierzchni
+    rgb = pygame.surfarray.pixels3d(tinted)
+    rgb[:] = rgb * np.array(color, dtype=np.uint16) // 255
+    del rgb  # zwalnia blokade powierzchni
     return tinted
 
 
+# ------------------------------------------------------
+# Colorkey zamiast alfy per piksel (szybszy blit RLE)
+# ------------------------------------------------------
+def colorkey_image(img):
+    alpha = pygame.surfarray.array_alpha(img)
+    opaque = alpha == 255
+    if ((alpha > 0) & ~opaque).any():
+        return img  # polprzezroczyste piksele - zostaje alfa
+    if (pygame.surfarray.array3d(img)[opaque] == COLORKEY).all(axis=-1).any():
+        return img  # kolor klucza wystepuje w obrazku
+
+    keyed = pygame.Surface(img.get_size()).convert()
+    keyed.fill(COLORKEY)
+    keyed.blit(img, (0, 0))
+    keyed.set_colorkey(COLORKEY, pygame.RLEACCEL)
+    return keyed
+
+
 # ------------------------------------------------------
 # Player
 # ------------------------------------------------------
 class Player:
     def __init__(self, x, y, image_path="dodo.png", scale=(64, 64)):
-        self.x = x
-        self.y = y
+        # pozycja w fixed-point Q16.16 (int), pos - pelne piksele
+        self.pos = (int(x), int(y))
+        self.xq = self.pos[0] << 16
+        self.yq = self.pos[1] << 16
 
         self.base_image = pygame.image.load(image_path).convert_alpha()
         if scale:
             self.base_image = pygame.transform.smoothscale(self.base_image, scale)
 
+        # wszystkie warianty koloru tintowane raz, przy starcie
+        self.tints = {
+            c: colorkey_image(tint_image(self.base_image, c)) for c in (WHITE, RED, GREEN, BLUE)
+        }
+
         self.color = (255, 255, 255)
         self.original_color = (255, 255, 255)   # <<<<<< DODANE
-        self.image = self.base_image.copy()
-        self.rect = self.image.get_rect(center=(int(x), int(y)))
+        self.image = self.tints[self.color]
+        self.rect = self.image.get_rect(center=self.pos)
 
 
-    @property
-    def pos(self):
-        return (int(self.x), int(self.y))
-
     def set_color(self, color):
         self.color = color
-        self.image = tint_image(self.base_image, color)
+        self.image = self.tints[color]
         self.rect = self.image.get_rect(center=self.rect.center)
 
-    def move(self, dx, dy):
-        self.x += dx
-        self.y += dy
-        self.rect.center = (int(self.x), int(self.y))
+    def set_pos_q(self, xq, yq):
+        self.xq = xq
+        self.yq = yq
+        self.pos = (xq >> 16, yq >> 16)
+        self.rect.center = self.pos
 
     def set_pos(self, x, y):
-        self.x = x
-        self.y = y
-        self.rect.center = (int(x), int(y))
+        self.pos = (int(x), int(y))
+        self.xq = self.pos[0] << 16
+        self.yq = self.pos[1] << 16
+        self.rect.center = self.pos
 
     def clamp(self, w, h):
         self.rect.clamp_ip(pygame.Rect(0, 0, w, h))
-        self.x, self.y = self.rect.center
+        if self.rect.center != self.pos:
+            self.set_pos(*self.rect.center)
 
     def draw(self, surf):
         surf.blit(self.image, self.rect)
 
 
+# ------------------------------------------------------
+# Krok ruchu gracza (ruch + clamp + dopisanie punktu trasy)
+# ------------------------------------------------------
+@njit(cache=True)
+def far_from_last(buf, n, x, y):
+    # czy punkt (x, y) jest dosc daleko od ostatniego punktu trasy
+    if n == 0:
+        return True
+    ddx = buf[n - 1, 0] - x
+    ddy = buf[n - 1, 1] - y
+    return ddx * ddx + ddy * ddy >= PATH_MIN_DIST_SQ
+
+
+@njit("UniTuple(int64, 3)(int64, int64, int64, int64, int64, int64, int64, int64, int32[:, :], int64)",
+      cache=True)
+def step_player(xq, yq, dxq, dyq, lo_x, lo_y, hi_x, hi_y, buf, n):
+    # pozycja w Q16.16; zwraca (xq, yq, n) - n rosnie, gdy punkt trafil do bufora
+    xq += dxq
+    yq += dyq
+    x = xq >> 16
+    y = yq >> 16
+    if x < lo_x:
+        x = lo_x
+        xq = x << 16
+    elif x > hi_x:
+        x = hi_x
+        xq = x << 16
+    if y < lo_y:
+        y = lo_y
+        yq = y << 16
+    elif y > hi_y:
+        y = hi_y
+        yq = y << 16
+
+    # pelny bufor zostaje dla PathManager.push (upraszczanie trasy)
+    if n < buf.shape[0] and far_from_last(buf, n, x, y):
+        buf[n, 0] = x
+        buf[n, 1] = y
+        n += 1
+    return xq, yq, n
+
+
 # ------------------------------------------------------
 # Path manager
 # ------------------------------------------------------
+# kropka punktu trasy renderowana raz, wspolna dla calej trasy
+DOT = pygame.Surface((7, 7), pygame.SRCALPHA)
+pygame.draw.circle(DOT, GREY, (3, 3), 3)
+
+
 class PathManager:
-    def __init__(self):
-        self.stack = []
+    def __init__(self, size):
+        # punkty trasy w prealokowanym buforze int32, bez krotek
+        self.buf = np.empty((PATH_CAPACITY, 2), dtype=np.int32)
+        self.n = 0
+        # obszary zmienione od ostatniej klatki; None = przerysuj cala trase
+        self.dirty = None
+
+        # trasa rysowana przyrostowo na stalym overlayu
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+
+    @property
+    def stack(self):
+        return self.buf[:self.n]
 
     def push(self, pos):
-        if not self.stack or self.stack[-1] != pos:
-            self.stack.append(pos)
+        x, y = pos
+        n = self.n
+        if not far_from_last(self.buf, n, x, y):
+            return
+        evicted = n == PATH_CAPACITY
+        if evicted:
+            # bufor pelny - usuwamy najstarsze punkty, cwierc bufora naraz
+            drop = PATH_CAPACITY // 4
+            self.buf[:n - drop] = self.buf[drop:n]
+            n -= drop
+            self.dirty = None
+        self.buf[n] = x, y
+        self.n = n + 1
+        self.on_push(evicted)
+
+    def step(self, player, dxq, dyq, bounds):
+        # ruch gracza i dopisanie punktu jednym wywolaniem jadra
+        n = self.n
+        xq, yq, self.n = step_player(player.xq, player.yq, dxq, dyq, *bounds, self.buf, n)
+        player.set_pos_q(xq, yq)
+        if self.n > n:
+            self.on_push()
+        elif n == PATH_CAPACITY:
+            self.push(player.pos)
+
+    def on_push(self, evicted=False):
+        # overlay i obszary zmienione dla punktu dopisanego na koncu bufora
+        n = self.n - 1
+        if evicted:
+            self.render_overlay()
+        elif n:
+            self.draw_segment(n)
+
+        if self.dirty is not None:
+            x, y = self.buf[n].tolist()
+            px, py = self.buf[n - 1].tolist() if n else (x, y)
+            self.dirty.append(pygame.Rect(
+                min(px, x) - 4, min(py, y) - 4, abs(x - px) + 9, abs(y - py) + 9
+            ))
 
     def clear(self):
-        self.stack.clear()
+        self.n = 0
+        self.overlay.fill((0, 0, 0, 0))
+        self.dirty = None
+
+    def take_dirty(self):
+        dirty, self.dirty = self.dirty, []
+        return dirty
+
+    def draw_segment(self, i):
+        # odcinek konczacy sie w punkcie i (i >= 1) + jego kropki
+        (ax, ay), (bx, by) = self.buf[i - 1:i + 1].tolist()
+        pygame.draw.line(self.overlay, GREY, (ax, ay), (bx, by), 2)
+        if i == 1:
+            self.overlay.blit(DOT, (ax - 3, ay - 3))
+        self.overlay.blit(DOT, (bx - 3, by - 3))
+
+    def render_overlay(self):
+        self.overlay.fill((0, 0, 0, 0))
+        if self.n > 1:
+            pts = self.stack.tolist()
+            pygame.draw.lines(self.overlay, GREY, False, pts, 2)
+            self.overlay.blits([(DOT, (x - 3, y - 3)) for x, y in pts], doreturn=False)
 
     def draw(self, surface):
-        if len(self.stack) > 1:
-            pygame.draw.lines(surface, (200, 200, 200), False, self.stack, 2)
-            for p in self.stack:
-                pygame.draw.circle(surface, (200, 200, 200), p, 3)
+        surface.blit(self.overlay, (0, 0))
 
 
 # ------------------------------------------------------
@@ -93,6 +250,11 @@ class PathManager:
 class GameApp:
     def __init__(self, w=WIDTH, h=HEIGHT):
         pygame.init()
+        # do kolejki trafiaja tylko obslugiwane zdarzenia (bez MOUSEMOTION)
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(
+            [pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.WINDOWEXPOSED]
+        )
         pygame.display.set_caption("Pygame - Optymalizacja")
         self.screen = pygame.display.set_mode((w, h))
         self.clock = pygame.time.Clock()
@@ -100,24 +262,32 @@ class GameApp:
 
         # tło
         try:
-            bg = pygame.image.load("tlo.jpg").convert()
-            self.background = pygame.transform.smoothscale(bg, (w, h))
+            bg = pygame.image.load("tlo.jpg")
+            # konwersja po skalowaniu - format ekranu, szybka sciezka blitu
+            self.background = pygame.transform.smoothscale(bg, (w, h)).convert(self.screen)
         except:
             self.background = None
 
         self.player = Player(w // 2, h // 2)
-        self.path = PathManager()
+        # zakres srodka gracza, przy ktorym obrazek miesci sie w oknie
+        r = self.player.rect
+        self.move_bounds = (r.w // 2, r.h // 2, w - r.w + r.w // 2, h - r.h + r.h // 2)
+        self.path = PathManager((w, h))
         self.path.push(self.player.pos)
 
         # playback
         self.playback = False
-        self.play_stack = []
+        self.play_stack = None
+        self.play_index = 0
         self.frame_delay = 3
         self.frame_counter = 0
 
         # wygenerowany HUD (tekst)
         self.hud_surf = self.render_hud()
 
+        self.prev_player_rect = self.player.rect.copy()
+        self.dirty = []
+
         self.w, self.h = w, h
 
     # ----------------------------------------------
@@ -142,22 +312,26 @@ class GameApp:
     # Playback
     # ----------------------------------------------
     def start_playback(self):
-        if not self.playback and self.path.stack:
+        if not self.playback and self.path.n:
             self.playback = True
+            # jedna kopia bufora (trase mozna zmienic w trakcie cofania)
             self.play_stack = self.path.stack.copy()
+            self.play_index = len(self.play_stack)
             self.frame_counter = 0
 
     def update_playback(self):
         if not self.playback:
             return
-        if not self.play_stack:
+        if not self.play_index:
             self.playback = False
+            self.play_stack = None
             return
 
         self.frame_counter += 1
         if self.frame_counter >= self.frame_delay:
             self.frame_counter = 0
-            x, y = self.play_stack.pop()
+            self.play_index -= 1
+            x, y = self.play_stack[self.play_index].tolist()
             self.player.set_pos(x, y)
 
     # ----------------------------------------------
@@ -165,13 +339,12 @@ class GameApp:
     # ----------------------------------------------
     def handle_events(self, dt):
         keys = pygame.key.get_pressed()
-        dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * PLAYER_SPEED * dt
-        dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * PLAYER_SPEED * dt
+        step = int(PLAYER_SPEED_Q * dt)
+        dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * step
+        dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * step
 
         if not self.playback and (dx or dy):
-            self.player.move(dx, dy)
-            self.player.clamp(self.w, self.h)
-            self.path.push(self.player.pos)
+            self.path.step(self.player, dx, dy, self.move_bounds)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -186,19 +359,38 @@ class GameApp:
                     self.path.clear()
                     self.path.push(self.player.pos)
                 elif event.key == pygame.K_r:
-                    self.player.set_color((255, 0, 0))
+                    self.player.set_color(RED)
                 elif event.key == pygame.K_g:
-                    self.player.set_color((0, 255, 0))
+                    self.player.set_color(GREEN)
                 elif event.key == pygame.K_b:
-                    self.player.set_color((0, 0, 255))
+                    self.player.set_color(BLUE)
                 elif event.key == pygame.K_n:
                     self.player.set_color(self.player.original_color)
 
+            if event.type == pygame.WINDOWEXPOSED:
+                # odsloniete / przywrocone okno - odswiezamy caly ekran
+                self.dirty.append(self.screen.get_rect())
+
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 self.player.set_pos(*event.pos)
                 self.player.clamp(self.w, self.h)
                 self.path.push(self.player.pos)
 
+    # ----------------------------------------------
+    # Rysowanie (z uwzglednieniem aktualnego clipa ekranu)
+    # ----------------------------------------------
+    def draw_scene(self):
+        if self.background:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            self.screen.fill(WHITE)
+
+        self.path.draw(self.screen)
+        self.player.draw(self.screen)
+
+        # HUD
+        self.screen.blit(self.hud_surf, (5, 5))
+
     # ----------------------------------------------
     # Main loop
     # ----------------------------------------------
@@ -208,18 +400,26 @@ class GameApp:
             self.handle_events(dt)
             self.update_playback()
 
-            if self.background:
-                self.screen.blit(self.background, (0, 0))
+            path_dirty = self.path.take_dirty()
+            if path_dirty is None:
+                # trasa wyczyszczona (lub pierwsza klatka) - caly ekran
+                self.dirty.append(self.screen.get_rect())
             else:
-                self.screen.fill(WHITE)
-
-            self.path.draw(self.screen)
-            self.player.draw(self.screen)
-
-            # HUD
-            self.screen.blit(self.hud_surf, (5, 5))
-
-            pygame.display.flip()
+                # odswiezamy tylko obszary gracza i nowych odcinkow trasy
+                if self.player.rect.colliderect(self.prev_player_rect):
+                    self.dirty.append(self.player.rect.union(self.prev_player_rect))
+                else:
+                    self.dirty += [self.prev_player_rect, self.player.rect.copy()]
+                self.dirty += path_dirty
+
+            for rect in self.dirty:
+                self.screen.set_clip(rect)
+                self.draw_scene()
+            self.screen.set_clip(None)
+
+            pygame.display.update(self.dirty)
+            self.dirty.clear()
+            self.prev_player_rect = self.player.rect.copy()
 
     def quit(self):
         pygame.quit()